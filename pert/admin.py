@@ -1,5 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import Count
 from .models import Projet, Tache
+from .views import _recalculer_pert
 
 
 @admin.register(Projet)
@@ -10,10 +12,15 @@ class ProjetAdmin(admin.ModelAdmin):
     search_fields = ['nom', 'description']
     date_hierarchy = 'date_creation'
     
+    def get_queryset(self, request):
+        """Annoter le nombre de tâches pour éviter une requête par ligne"""
+        return super().get_queryset(request).annotate(_nb_taches=Count('taches'))
+    
     def nb_taches(self, obj):
         """Affiche le nombre de tâches"""
-        return obj.taches.count()
+        return obj._nb_taches
     nb_taches.short_description = 'Nombre de tâches'
+    nb_taches.admin_order_field = '_nb_taches'
 
 
 @admin.register(Tache)
@@ -21,6 +28,7 @@ class TacheAdmin(admin.ModelAdmin):
     """Interface d'administration pour les tâches"""
     list_display = ['code', 'nom', 'projet', 'duree', 'marge_totale', 'est_critique']
     list_filter = ['projet', 'marge_totale']
+    list_select_related = ['projet']
     search_fields = ['code', 'nom', 'description']
     filter_horizontal = ['dependances']
     
@@ -45,4 +53,38 @@ class TacheAdmin(admin.ModelAdmin):
         'date_debut_tot', 'date_fin_tot',
         'date_debut_tard', 'date_fin_tard',
         'marge_totale', 'marge_libre'
-    ]
\ No newline at end of file
+    ]
+    
+    def save_related(self, request, form, formsets, change):
+        """Recalculer le PERT une fois la tâche et ses dépendances enregistrées"""
+        super().save_related(request, form, formsets, change)
+        projets = {form.instance.projet}
+        if change and 'projet' in form.changed_data:
+            # Tâche déplacée : l'ancien projet perd une tâche
+            projets.add(Projet.objects.get(pk=form.initial['projet']))
+        for projet in projets:
+            self._recalculer(request, projet)
+    
+    def delete_model(self, request, obj):
+        """Recalculer le PERT du projet après suppression d'une tâche"""
+        projet = obj.projet
+        super().delete_model(request, obj)
+        self._recalculer(request, projet)
+    
+    def delete_queryset(self, request, queryset):
+        """Recalculer le PERT des projets touchés par une suppression groupée"""
+        projets = list(Projet.objects.filter(taches__in=queryset).distinct())
+        super().delete_queryset(request, queryset)
+        for projet in projets:
+            self._recalculer(request, projet)
+    
+    def _recalculer(self, request, projet):
+        """
+        Recalcule le PERT d'un projet après une modification dans l'admin
+        L'admin reste un outil de saisie libre : un cycle n'annule pas la
+        modification, il est seulement signalé
+        """
+        try:
+            _recalculer_pert(projet)
+        except ValueError as e:
+            messages.error(request, f"Projet \"{projet}\" : {str(e)}")
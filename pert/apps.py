@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PertConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pert'
+
+    def ready(self):
+        # Enregistrer les signaux de l'application
+        from . import signals  # noqa: F401
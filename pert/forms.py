@@ -67,17 +67,12 @@ class TacheForm(forms.ModelForm):
         projet = kwargs.pop('projet', None)
         super().__init__(*args, **kwargs)
         
-        # Limiter les dépendances aux tâches du même projet
+        # Limiter les dépendances aux tâches du même projet, en excluant
+        # la tâche courante
         if projet:
-            # Exclure la tâche courante si elle existe
-            if self.instance.pk:
-                self.fields['dependances'].queryset = Tache.objects.filter(
-                    projet=projet
-                ).exclude(pk=self.instance.pk)
-            else:
-                self.fields['dependances'].queryset = Tache.objects.filter(
-                    projet=projet
-                )
+            self.fields['dependances'].queryset = Tache.objects.filter(
+                projet=projet
+            ).exclude(pk=self.instance.pk or 0)
         else:
             self.fields['dependances'].queryset = Tache.objects.none()
     
@@ -94,21 +89,3 @@ class TacheForm(forms.ModelForm):
         if duree and duree <= 0:
             raise forms.ValidationError("La durée doit être supérieure à 0")
         return duree
-    
-    def clean(self):
-        """Validation globale du formulaire"""
-        cleaned_data = super().clean()
-        
-        # Vérifier l'unicité du code dans le projet
-        code = cleaned_data.get('code')
-        if code and hasattr(self.instance, 'projet'):
-            projet = self.instance.projet
-            existing = Tache.objects.filter(projet=projet, code=code)
-            if self.instance.pk:
-                existing = existing.exclude(pk=self.instance.pk)
-            if existing.exists():
-                raise forms.ValidationError(
-                    f"Le code '{code}' existe déjà dans ce projet. Choisissez un code unique."
-                )
-        
-        return cleaned_data
\ No newline at end of file
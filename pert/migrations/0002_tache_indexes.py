@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-15 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pert', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', 'marge_totale'], name='pert_tache_projet__13e6aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', 'date_fin_tot'], name='pert_tache_projet__29f67d_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-15 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pert', '0002_tache_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, verbose_name='Dernière modification'),
+        ),
+    ]
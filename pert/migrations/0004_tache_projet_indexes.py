@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-15 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pert', '0003_tache_date_modification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', 'date_debut_tot'], name='pert_tache_projet__281c51_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-15 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pert', '0004_tache_projet_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='tache',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='tache',
+            constraint=models.UniqueConstraint(fields=('projet', 'code'), name='uniq_projet_code'),
+        ),
+    ]
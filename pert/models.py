@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Max
 from django.core.exceptions import ValidationError
 
 class Projet(models.Model):
@@ -24,20 +25,12 @@ class Projet(models.Model):
     @property
     def duree_totale(self):
         """Calcule la durée totale du projet"""
-        taches = self.taches.all()
-        if not taches.exists():
-            return 0
-        dates_fin = [t.date_fin_tot for t in taches if t.date_fin_tot is not None]
-        return max(dates_fin) if dates_fin else 0
+        return self.taches.aggregate(m=Max('date_fin_tot'))['m'] or 0
     
     @property
     def marge_max(self):
         """Retourne la marge maximale du projet"""
-        taches = self.taches.all()
-        if not taches.exists():
-            return 0
-        marges = [t.marge_totale for t in taches if t.marge_totale is not None]
-        return max(marges) if marges else 0
+        return self.taches.aggregate(m=Max('marge_totale'))['m'] or 0
     
     @property
     def chemin_critique(self):
@@ -103,11 +96,20 @@ class Tache(models.Model):
         verbose_name="Marge libre"
     )
     
+    date_modification = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
     class Meta:
         verbose_name = "Tâche"
         verbose_name_plural = "Tâches"
         ordering = ['code']
-        unique_together = ['projet', 'code']
+        constraints = [
+            models.UniqueConstraint(fields=['projet', 'code'], name='uniq_projet_code'),
+        ]
+        indexes = [
+            models.Index(fields=['projet', 'marge_totale']),
+            models.Index(fields=['projet', 'date_debut_tot']),
+            models.Index(fields=['projet', 'date_fin_tot']),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.nom}"
@@ -124,11 +126,6 @@ class Tache(models.Model):
         if self.duree and self.duree <= 0:
             raise ValidationError("La durée doit être supérieure à 0")
     
-    def save(self, *args, **kwargs):
-        """Surcharge pour forcer le code en majuscules"""
-        self.code = self.code.upper()
-        super().save(*args, **kwargs)
-    
     @property
     def est_critique(self):
         """Détermine si la tâche est critique"""
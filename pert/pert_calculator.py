@@ -1,4 +1,9 @@
-from collections import defaultdict, deque
+from collections import deque
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Tache
 
 class PertCalculator:
     """
@@ -12,76 +17,53 @@ class PertCalculator:
         Args:
             taches: QuerySet ou liste d'objets Tache
         """
+        # Précharger les relations pour éviter une requête par tâche
+        if hasattr(taches, 'prefetch_related'):
+            taches = taches.prefetch_related('dependances', 'successeurs')
         self.taches = list(taches)
         self.taches_dict = {t.code: t for t in self.taches}
+        
+        # Listes d'adjacence construites une seule fois (codes des tâches)
+        self.deps = {
+            t.code: [d.code for d in t.dependances.all()] for t in self.taches
+        }
+        self.succs = {
+            t.code: [s.code for s in t.successeurs.all()] for t in self.taches
+        }
         self.dates_debut_tot = {}
         self.dates_fin_tot = {}
         self.dates_debut_tard = {}
         self.dates_fin_tard = {}
+        
+        # Ordre topologique calculé une seule fois (calculateur à usage unique)
+        self._ordre = None
+        self._ordre_rev = None
     
     def calculer(self):
         """
         Lance tous les calculs PERT dans l'ordre
-        Retourne True si succès, False si erreur
+        Lève ValueError si le projet contient des dépendances circulaires
         """
         if not self.taches:
-            return True
+            return
         
-        try:
-            # 1. Vérifier les dépendances circulaires
-            if self._has_circular_dependency():
-                raise ValueError("Dépendances circulaires détectées dans le projet !")
-            
-            # 2. Calcul des dates au plus tôt (forward pass)
-            self._calculer_dates_tot()
-            
-            # 3. Calcul des dates au plus tard (backward pass)
-            self._calculer_dates_tard()
-            
-            # 4. Calcul des marges
-            self._calculer_marges()
-            
-            # 5. Sauvegarder tous les résultats
-            self._sauvegarder_resultats()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Erreur lors du calcul PERT: {e}")
-            return False
-    
-    def _has_circular_dependency(self):
-        """
-        Détecte les dépendances circulaires avec un algorithme DFS
-        Retourne True si cycle détecté
-        """
-        visited = set()
-        rec_stack = set()
+        # 1. Vérifier les dépendances circulaires : le tri de Kahn
+        #    laisse de côté les tâches prises dans un cycle
+        self._tri_topologique()
+        if len(self._ordre) != len(self.taches):
+            raise ValueError("Dépendances circulaires détectées dans le projet !")
         
-        def dfs(tache_code):
-            """DFS récursif pour détecter les cycles"""
-            visited.add(tache_code)
-            rec_stack.add(tache_code)
-            
-            tache = self.taches_dict.get(tache_code)
-            if tache:
-                for dep in tache.dependances.all():
-                    if dep.code not in visited:
-                        if dfs(dep.code):
-                            return True
-                    elif dep.code in rec_stack:
-                        return True
-            
-            rec_stack.remove(tache_code)
-            return False
+        # 2. Calcul des dates au plus tôt (forward pass)
+        self._calculer_dates_tot()
         
-        # Tester depuis chaque tâche non visitée
-        for tache in self.taches:
-            if tache.code not in visited:
-                if dfs(tache.code):
-                    return True
+        # 3. Calcul des dates au plus tard (backward pass)
+        self._calculer_dates_tard()
+        
+        # 4. Calcul des marges
+        self._calculer_marges()
         
-        return False
+        # 5. Sauvegarder tous les résultats
+        self._sauvegarder_resultats()
     
     def _calculer_dates_tot(self):
         """
@@ -100,10 +82,10 @@ class PertCalculator:
             tache = self.taches_dict[tache_code]
             
             # Date de début = max des dates de fin des dépendances
-            deps = list(tache.dependances.all())
+            deps = self.deps[tache_code]
             if deps:
                 self.dates_debut_tot[tache_code] = max(
-                    self.dates_fin_tot[d.code] for d in deps
+                    self.dates_fin_tot[d] for d in deps
                 )
             else:
                 # Tâche de départ
@@ -129,23 +111,24 @@ class PertCalculator:
         
         # Tâches finales (sans successeurs) : date_fin_tard = date_fin_tot
         for tache in self.taches:
-            if not tache.successeurs.exists():
+            if not self.succs[tache.code]:
                 self.dates_fin_tard[tache.code] = self.dates_fin_tot[tache.code]
                 self.dates_debut_tard[tache.code] = (
                     self.dates_fin_tard[tache.code] - tache.duree
                 )
         
         # Tri topologique inverse (traiter dans l'ordre inverse)
-        ordre = list(reversed(self._tri_topologique()))
+        self._tri_topologique()
+        ordre = self._ordre_rev
         
         for tache_code in ordre:
             tache = self.taches_dict[tache_code]
             
             # Date de fin au plus tard = min des dates de début au plus tard des successeurs
-            successeurs = list(tache.successeurs.all())
+            successeurs = self.succs[tache_code]
             if successeurs:
                 self.dates_fin_tard[tache_code] = min(
-                    self.dates_debut_tard[s.code] for s in successeurs
+                    self.dates_debut_tard[s] for s in successeurs
                 )
             
             # Date de début au plus tard = date de fin au plus tard - durée
@@ -167,10 +150,10 @@ class PertCalculator:
             )
             
             # Marge libre = min(date début tôt successeurs) - date fin tôt
-            successeurs = list(tache.successeurs.all())
+            successeurs = self.succs[tache.code]
             if successeurs:
                 min_debut_successeurs = min(
-                    self.dates_debut_tot[s.code] for s in successeurs
+                    self.dates_debut_tot[s] for s in successeurs
                 )
                 tache.marge_libre = (
                     min_debut_successeurs - self.dates_fin_tot[tache.code]
@@ -183,18 +166,16 @@ class PertCalculator:
         """
         Effectue un tri topologique des tâches (algorithme de Kahn avec BFS)
         Retourne la liste des codes de tâches dans l'ordre topologique
+        (mise en cache après le premier appel)
         """
-        # Compter les dépendances entrantes de chaque tâche
-        in_degree = defaultdict(int)
+        if self._ordre is not None:
+            return self._ordre
         
-        for tache in self.taches:
-            if tache.code not in in_degree:
-                in_degree[tache.code] = 0
-            for dep in tache.dependances.all():
-                in_degree[tache.code] += 1
+        # Compter les dépendances entrantes de chaque tâche
+        in_degree = {code: len(self.deps[code]) for code in self.taches_dict}
         
         # File pour le BFS - commencer par les tâches sans dépendances
-        queue = deque([t.code for t in self.taches if in_degree[t.code] == 0])
+        queue = deque([code for code, degre in in_degree.items() if degre == 0])
         ordre = []
         
         # BFS
@@ -203,24 +184,40 @@ class PertCalculator:
             ordre.append(tache_code)
             
             # Pour chaque successeur, diminuer son degré entrant
-            tache = self.taches_dict[tache_code]
-            for successeur in tache.successeurs.all():
-                in_degree[successeur.code] -= 1
+            for successeur_code in self.succs[tache_code]:
+                in_degree[successeur_code] -= 1
                 # Si plus de dépendances, ajouter à la file
-                if in_degree[successeur.code] == 0:
-                    queue.append(successeur.code)
+                if in_degree[successeur_code] == 0:
+                    queue.append(successeur_code)
         
+        self._ordre = ordre
+        self._ordre_rev = list(reversed(ordre))
         return ordre
     
     def _sauvegarder_resultats(self):
-        """Sauvegarde tous les résultats calculés dans la base de données"""
+        """Sauvegarde tous les résultats calculés en une seule requête groupée"""
+        # bulk_update ne gère pas auto_now : la date de modification est
+        # mise à jour explicitement pour invalider le cache du diagramme
+        maintenant = timezone.now()
         for tache in self.taches:
             tache.date_debut_tot = self.dates_debut_tot[tache.code]
             tache.date_fin_tot = self.dates_fin_tot[tache.code]
             tache.date_debut_tard = self.dates_debut_tard[tache.code]
             tache.date_fin_tard = self.dates_fin_tard[tache.code]
+            tache.date_modification = maintenant
             # marge_totale et marge_libre déjà assignées dans _calculer_marges
-            tache.save()
+        
+        with transaction.atomic():
+            Tache.objects.bulk_update(
+                self.taches,
+                [
+                    'date_debut_tot', 'date_fin_tot',
+                    'date_debut_tard', 'date_fin_tard',
+                    'marge_totale', 'marge_libre',
+                    'date_modification',
+                ],
+                batch_size=500,
+            )
     
     def get_chemin_critique(self):
         """
@@ -0,0 +1,11 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from .models import Tache
+
+
+@receiver(pre_save, sender=Tache)
+def normaliser_code_tache(sender, instance, **kwargs):
+    """Force le code de la tâche en majuscules avant chaque sauvegarde"""
+    if instance.code:
+        instance.code = instance.code.upper()
@@ -1,3 +1,181 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Projet, Tache
+from .pert_calculator import PertCalculator
+
+
+class PertTestCase(TestCase):
+    """Projet de référence : A -> B, A -> C, (B, C) -> D"""
+
+    def setUp(self):
+        self.projet = Projet.objects.create(nom="Projet test")
+        self.a = Tache.objects.create(projet=self.projet, code='A', nom='A', duree=3)
+        self.b = Tache.objects.create(projet=self.projet, code='B', nom='B', duree=2)
+        self.c = Tache.objects.create(projet=self.projet, code='C', nom='C', duree=4)
+        self.d = Tache.objects.create(projet=self.projet, code='D', nom='D', duree=1)
+        self.b.dependances.add(self.a)
+        self.c.dependances.add(self.a)
+        self.d.dependances.add(self.b, self.c)
+
+    def donnees_tache(self, tache, **valeurs):
+        """Données POST du formulaire de tâche, à partir d'une tâche existante"""
+        donnees = {
+            'code': tache.code,
+            'nom': tache.nom,
+            'duree': tache.duree,
+            'dependances': [dep.pk for dep in tache.dependances.all()],
+        }
+        donnees.update(valeurs)
+        return donnees
+
+
+class PertCalculatorTests(PertTestCase):
+
+    def test_dates_et_marges(self):
+        PertCalculator(self.projet.taches.all()).calculer()
+
+        resultats = {
+            t.code: (
+                t.date_debut_tot, t.date_fin_tot,
+                t.date_debut_tard, t.date_fin_tard,
+                t.marge_totale, t.marge_libre,
+            )
+            for t in self.projet.taches.all()
+        }
+        self.assertEqual(resultats, {
+            'A': (0, 3, 0, 3, 0, 0),
+            'B': (3, 5, 5, 7, 2, 2),
+            'C': (3, 7, 3, 7, 0, 0),
+            'D': (7, 8, 7, 8, 0, 0),
+        })
+
+    def test_dependances_circulaires(self):
+        self.a.dependances.add(self.d)
+
+        with self.assertRaises(ValueError):
+            PertCalculator(self.projet.taches.all()).calculer()
+
+
+class TacheViewTests(PertTestCase):
+
+    def test_creation_code_en_double(self):
+        response = self.client.post(
+            reverse('tache_create', args=[self.projet.pk]),
+            {'code': 'b', 'nom': 'Doublon', 'duree': 1},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('code'))
+        self.assertEqual(self.projet.taches.count(), 4)
+
+    def test_renommage_code_en_double(self):
+        response = self.client.post(
+            reverse('tache_update', args=[self.b.pk]),
+            self.donnees_tache(self.b, code='C'),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('code'))
+        self.b.refresh_from_db()
+        self.assertEqual(self.b.code, 'B')
+
+    def test_modification_creant_un_cycle(self):
+        response = self.client.post(
+            reverse('tache_update', args=[self.a.pk]),
+            self.donnees_tache(self.a, dependances=[self.d.pk]),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.assertFalse(self.a.dependances.exists())
+
+    def test_creation_dans_un_projet_avec_cycle(self):
+        self.a.dependances.add(self.d)
+
+        response = self.client.post(
+            reverse('tache_create', args=[self.projet.pk]),
+            {'code': 'E', 'nom': 'E', 'duree': 1},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.assertIsNone(response.context['form'].instance.pk)
+        self.assertFalse(self.projet.taches.filter(code='E').exists())
+
+    def test_suppression_dans_un_projet_avec_cycle(self):
+        self.a.dependances.add(self.d)
+        z = Tache.objects.create(projet=self.projet, code='Z', nom='Z', duree=1)
+
+        response = self.client.post(
+            reverse('tache_delete', args=[z.pk]), follow=True
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'circulaires')
+        self.assertFalse(Tache.objects.filter(pk=z.pk).exists())
+
+
+class DiagrammeViewTests(PertTestCase):
+
+    def test_diagramme_apres_modification(self):
+        PertCalculator(self.projet.taches.all()).calculer()
+        url = reverse('diagramme', args=[self.projet.pk])
+        self.assertEqual(self.client.get(url).context['duree_totale'], 8)
+
+        self.client.post(
+            reverse('tache_update', args=[self.b.pk]),
+            self.donnees_tache(self.b, duree=9),
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['duree_totale'], 13)
+        self.assertIn('"date_fin_tot":12', response.context['taches_json'])
+
+    def test_formulaire_modification_sans_requete_par_tache(self):
+        # Les cases à cocher ne doivent déclencher aucune requête par tâche
+        # (champ différé chargé à la volée)
+        url = reverse('tache_update', args=[self.d.pk])
+        self.client.get(url)
+        Tache.objects.create(projet=self.projet, code='E', nom='E', duree=1)
+
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+
+class TacheAdminTests(PertTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from django.contrib.auth.models import User
+        User.objects.create_superuser('admin', 'admin@example.com', 'motdepasse')
+        self.client.login(username='admin', password='motdepasse')
+
+    def test_modification_admin_recalcule_le_diagramme(self):
+        PertCalculator(self.projet.taches.all()).calculer()
+        url = reverse('diagramme', args=[self.projet.pk])
+        self.assertEqual(self.client.get(url).context['duree_totale'], 8)
+
+        self.client.post(
+            reverse('admin:pert_tache_change', args=[self.b.pk]),
+            {
+                'projet': self.projet.pk,
+                'code': 'B',
+                'nom': 'B',
+                'duree': 9,
+                'dependances': [self.a.pk],
+            },
+        )
+
+        self.assertEqual(self.client.get(url).context['duree_totale'], 13)
+
+    def test_suppression_admin_recalcule(self):
+        PertCalculator(self.projet.taches.all()).calculer()
+
+        self.client.post(
+            reverse('admin:pert_tache_delete', args=[self.c.pk]),
+            {'post': 'yes'},
+        )
+
+        self.d.refresh_from_db()
+        self.assertEqual(self.d.date_fin_tot, 6)
@@ -1,7 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.http import JsonResponse
-import json
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils.safestring import mark_safe
+import orjson
 
 from .models import Projet, Tache
 from .forms import ProjetForm, TacheForm
@@ -41,13 +45,16 @@ def projet_create(request):
 def projet_detail(request, pk):
     """Afficher les détails d'un projet et ses tâches"""
     projet = get_object_or_404(Projet, pk=pk)
-    taches = projet.taches.all().order_by('code')
+    # Une seule requête (+ préchargement) : tout le reste est dérivé en Python
+    taches = list(projet.taches.prefetch_related('dependances').order_by('code'))
+    taches_critiques = [t for t in taches if t.marge_totale == 0]
+    duree_totale = max((t.date_fin_tot or 0) for t in taches) if taches else 0
     
     return render(request, 'pert/projet_detail.html', {
         'projet': projet,
         'taches': taches,
-        'taches_critiques': projet.taches_critiques,
-        'duree_totale': projet.duree_totale,
+        'taches_critiques': taches_critiques,
+        'duree_totale': duree_totale,
     })
 
 
@@ -95,19 +102,38 @@ def tache_create(request, projet_id):
         if form.is_valid():
             tache = form.save(commit=False)
             tache.projet = projet
-            tache.save()
-            form.save_m2m()  # Sauvegarder les relations ManyToMany (dépendances)
-            
-            # Recalculer le PERT après ajout de la tâche
-            _recalculer_pert(projet)
-            
-            messages.success(request, f'Tâche "{tache.code}" ajoutée avec succès !')
-            return redirect('projet_detail', pk=projet.pk)
+            try:
+                # Sauvegarde et recalcul dans une même transaction : une
+                # erreur (code en double, cycle) annule l'ajout complet
+                with transaction.atomic():
+                    tache.save()
+                    form.save_m2m()  # Sauvegarder les relations ManyToMany (dépendances)
+                    
+                    # Recalculer le PERT après ajout de la tâche
+                    _recalculer_pert(projet)
+            except IntegrityError:
+                _annuler_creation(tache)
+                # Ne traduire en erreur de formulaire que la violation de
+                # uniq_projet_code ; toute autre erreur d'intégrité remonte
+                if not _code_en_double(tache):
+                    raise
+                _ajouter_erreur_code(form)
+            except ValueError as e:
+                _annuler_creation(tache)
+                # Erreur sur le graphe du projet, pas sur un champ du formulaire
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, f'Tâche "{tache.code}" ajoutée avec succès !')
+                return redirect('projet_detail', pk=projet.pk)
     else:
         form = TacheForm(projet=projet)
     
     # Récupérer les tâches disponibles pour les dépendances
-    taches_disponibles = projet.taches.all().order_by('code')
+    # (seuls les champs affichés par les cases à cocher sont chargés ;
+    # 'projet' reste nécessaire au gestionnaire de relation)
+    taches_disponibles = projet.taches.only(
+        'id', 'projet', 'code', 'nom', 'duree'
+    ).order_by('code')
     
     return render(request, 'pert/tache_form.html', {
         'form': form,
@@ -125,18 +151,36 @@ def tache_update(request, pk):
     if request.method == 'POST':
         form = TacheForm(request.POST, instance=tache, projet=projet)
         if form.is_valid():
-            tache = form.save()
-            
-            # Recalculer le PERT après modification
-            _recalculer_pert(projet)
-            
-            messages.success(request, f'Tâche "{tache.code}" modifiée avec succès !')
-            return redirect('projet_detail', pk=projet.pk)
+            try:
+                # Sauvegarde et recalcul dans une même transaction : une
+                # erreur (code en double, cycle) annule la modification
+                with transaction.atomic():
+                    tache = form.save()
+                    
+                    # Recalculer le PERT seulement si la durée ou les dépendances ont changé
+                    if set(form.changed_data) & {'duree', 'dependances'}:
+                        _recalculer_pert(projet)
+            except IntegrityError:
+                # Ne traduire en erreur de formulaire que la violation de
+                # uniq_projet_code ; toute autre erreur d'intégrité remonte
+                if not _code_en_double(tache):
+                    raise
+                _ajouter_erreur_code(form)
+            except ValueError as e:
+                # Erreur sur le graphe du projet, pas sur un champ du formulaire
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, f'Tâche "{tache.code}" modifiée avec succès !')
+                return redirect('projet_detail', pk=projet.pk)
     else:
         form = TacheForm(instance=tache, projet=projet)
     
     # Récupérer les tâches disponibles (sauf la tâche courante)
-    taches_disponibles = projet.taches.exclude(pk=tache.pk).order_by('code')
+    # (seuls les champs affichés par les cases à cocher sont chargés ;
+    # 'projet' reste nécessaire au gestionnaire de relation)
+    taches_disponibles = projet.taches.only(
+        'id', 'projet', 'code', 'nom', 'duree'
+    ).exclude(pk=tache.pk).order_by('code')
     
     return render(request, 'pert/tache_form.html', {
         'form': form,
@@ -154,10 +198,18 @@ def tache_delete(request, pk):
     
     if request.method == 'POST':
         code = tache.code
-        tache.delete()
-        
-        # Recalculer le PERT après suppression
-        _recalculer_pert(projet)
+        with transaction.atomic():
+            tache.delete()
+            
+            # Recalculer le PERT après suppression. Le projet peut déjà
+            # contenir un cycle (saisi via l'admin ou par une ancienne
+            # version) : la suppression est tout de même conservée, elle
+            # peut justement servir à casser ce cycle, et seul le recalcul
+            # est annulé (_recalculer_pert a sa propre transaction)
+            try:
+                _recalculer_pert(projet)
+            except ValueError as e:
+                messages.error(request, f"Erreur: {str(e)}")
         
         messages.success(request, f'Tâche "{code}" supprimée avec succès !')
         return redirect('projet_detail', pk=projet.pk)
@@ -171,15 +223,37 @@ def tache_delete(request, pk):
 def diagramme(request, projet_id):
     """Afficher le diagramme PERT d'un projet"""
     projet = get_object_or_404(Projet, pk=projet_id)
-    taches = projet.taches.all()
     
-    # Recalculer le PERT avant l'affichage
-    _recalculer_pert(projet)
+    # Clé versionnée : change dès qu'une tâche est ajoutée, modifiée ou supprimée
+    etat = projet.taches.aggregate(
+        derniere_modification=Max('date_modification'),
+        nb=Count('id'),
+    )
+    derniere_modification = etat['derniere_modification']
+    cle = "pert:{}:{}:{}:{}".format(
+        projet.pk,
+        projet.date_modification.timestamp(),
+        derniere_modification.timestamp() if derniere_modification else 0,
+        etat['nb'],
+    )
+    donnees = cache.get_or_set(cle, lambda: _preparer_diagramme(projet), 3600)
+    
+    return render(request, 'pert/diagramme.html', {
+        'projet': projet,
+        **donnees,
+    })
+
+
+def _preparer_diagramme(projet):
+    """
+    Prépare les données (sérialisables) du diagramme PERT d'un projet
+    """
+    # Précharger les dépendances : get_dependances_codes lit alors le cache
+    taches = projet.taches.prefetch_related('dependances').all()
     
-    # Préparer les données pour le JavaScript
-    taches_json = []
-    for tache in taches:
-        taches_json.append({
+    # Préparer les données pour le JavaScript (sérialisation directe via orjson)
+    taches_json = orjson.dumps([
+        {
             'code': tache.code,
             'nom': tache.nom,
             'duree': tache.duree,
@@ -190,37 +264,68 @@ def diagramme(request, projet_id):
             'date_fin_tard': tache.date_fin_tard,
             'marge_totale': tache.marge_totale,
             'marge_libre': tache.marge_libre,
-        })
+        }
+        for tache in taches
+    ]).decode()
     
     # Chemin critique
-    chemin_critique = list(projet.chemin_critique)
-    chemin_critique_codes = [t.code for t in chemin_critique]
+    chemin_critique = [
+        {'code': t.code, 'duree': t.duree} for t in projet.chemin_critique
+    ]
+    chemin_critique_codes = orjson.dumps(
+        [t['code'] for t in chemin_critique]
+    ).decode()
     
-    return render(request, 'pert/diagramme.html', {
-        'projet': projet,
-        'taches': taches,
-        'taches_json': json.dumps(taches_json),
+    return {
+        'nb_taches': len(taches),
+        'taches_json': mark_safe(taches_json),
         'chemin_critique': chemin_critique,
-        'chemin_critique_codes': json.dumps(chemin_critique_codes),
-        'taches_critiques': projet.taches_critiques,
+        'chemin_critique_codes': mark_safe(chemin_critique_codes),
+        'nb_taches_critiques': len(chemin_critique),
         'duree_totale': projet.duree_totale,
         'marge_max': projet.marge_max,
-    })
+    }
 
 
 def _recalculer_pert(projet):
     """
     Fonction utilitaire pour recalculer les dates et marges PERT d'un projet
+    Lecture, calcul et sauvegarde se font dans une seule transaction, avec
+    verrouillage des tâches pour ne pas entrer en conflit avec une autre édition
+    Lève ValueError si le projet contient des dépendances circulaires
+    """
+    with transaction.atomic():
+        taches = list(
+            projet.taches.select_for_update()
+            .prefetch_related('dependances', 'successeurs')
+        )
+        PertCalculator(taches).calculer()
+
+
+def _annuler_creation(tache):
+    """
+    Remet une tâche dans l'état « non enregistrée » après l'annulation de
+    la transaction qui l'avait insérée
+    """
+    tache.pk = None
+    tache._state.adding = True
+
+
+def _code_en_double(tache):
+    """
+    Indique si une autre tâche du projet utilise déjà le code de cette tâche
+    """
+    return Tache.objects.filter(
+        projet=tache.projet, code=tache.code
+    ).exclude(pk=tache.pk).exists()
+
+
+def _ajouter_erreur_code(form):
+    """
+    Signale sur le formulaire un code de tâche déjà utilisé dans le projet
     """
-    taches = projet.taches.all()
-    if taches.exists():
-        try:
-            calculator = PertCalculator(taches)
-            success = calculator.calculer()
-            if not success:
-                messages.warning(
-                    None, 
-                    "Erreur lors du calcul PERT. Vérifiez les dépendances."
-                )
-        except ValueError as e:
-            messages.error(None, f"Erreur: {str(e)}")
\ No newline at end of file
+    form.add_error(
+        'code',
+        f"Le code '{form.cleaned_data['code']}' existe déjà dans ce projet. "
+        "Choisissez un code unique."
+    )